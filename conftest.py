@@ -0,0 +1,20 @@
+"""Shared pytest configuration for the pdf-toolkit test suite."""
+
+import gc
+
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _no_gc():
+    """
+    Disable the cyclic garbage collector for the test session.
+
+    The suite allocates thousands of short-lived MagicMock children whose
+    reference cycles trip generation-0 collections mid-test; refcounting
+    still reclaims the rest, and re-enabling at session end lets one final
+    collection settle anything cyclic.
+    """
+    gc.disable()
+    yield
+    gc.enable()
@@ -10,13 +10,22 @@ Supports multiple PDF rendering backends:
 """
 
 import argparse
+import functools
 import sys
 import os
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import io
+import json
+import tempfile
 import fnmatch
 import datetime
+import queue
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from enum import Enum
 
 
@@ -58,10 +67,25 @@ except ImportError:
 # Check if any backend is available
 PDF_TO_IMAGE_AVAILABLE = PYPDFIUM2_AVAILABLE or PYMUPDF_AVAILABLE or PDF2IMAGE_AVAILABLE
 
+# Try to import pikepdf for fast PDF splitting (libqpdf bindings)
+try:
+    import pikepdf
+    PIKEPDF_AVAILABLE = True
+except ImportError:
+    PIKEPDF_AVAILABLE = False
+
+# Try to import tqdm for rate-limited progress bars
+try:
+    from tqdm import tqdm
+    TQDM_AVAILABLE = True
+except ImportError:
+    TQDM_AVAILABLE = False
+
 # Google Drive OCR dependencies
 try:
     import httplib2
     from apiclient import discovery
+    from apiclient.errors import HttpError
     from apiclient.http import MediaFileUpload, MediaIoBaseDownload
     from oauth2client import file as oauth_file, client
     from oauth2client import tools as oauth_tools
@@ -75,8 +99,23 @@ except ImportError:
 SCOPES = "https://www.googleapis.com/auth/drive"
 DEFAULT_DPI = 200  # High DPI for better OCR quality
 DEFAULT_JPEG_QUALITY = 95  # High quality for better OCR
+ENCODE_QUEUE_DEPTH = 4  # Max decoded pages buffered between render and encode stages
 PAGES_PER_CHUNK = 10
+OCR_MAX_WORKERS = 3  # Concurrent Drive OCR requests (sweet spot before rate limits)
+RASTER_MAX_WORKERS = 4  # Cap on rasterization worker processes in batch mode
+DRIVE_MAX_RETRIES = 3
+# Below this size a single multipart POST beats the two-phase resumable
+# handshake (location URL + PUT), saving one round-trip per upload
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+DRIVE_RATE_LIMIT_RPS = 5  # Token bucket size / refill rate for Drive API calls
+RETRYABLE_HTTP_STATUS = {403, 429, 500, 502, 503}
+DISCOVERY_DOC_URL = "https://www.googleapis.com/discovery/v1/apis/drive/v3/rest"
+DISCOVERY_CACHE_MAX_AGE = 7 * 24 * 3600  # Re-fetch the discovery document weekly
 AUTO_CONVERT_TO_IMAGE = True  # Automatically convert to image PDF before OCR
+# Separator written between chunk texts in the combined output; precomputed
+# as a bytes template so the combine loop only fills in the chunk number
+_CHUNK_SEPARATOR_TEMPLATE = (
+    "\n\n" + "=" * 50 + " Chunk %d End " + "=" * 50 + "\n\n").encode('ascii')
 MIME_TYPES = {
     "pdf": 'application/pdf',
     "jpg": 'image/jpeg',
@@ -86,13 +125,14 @@ MIME_TYPES = {
     "bmp": 'image/bmp',
     "doc": 'application/msword'
 }
+_SUPPORTED_EXTS = frozenset(MIME_TYPES)
 
 
 class PDFToImageConverter:
     """Handles conversion of text-based PDFs to image-based PDFs with multiple backend support"""
 
     def __init__(self, dpi: int = DEFAULT_DPI, jpeg_quality: int = DEFAULT_JPEG_QUALITY,
-                 backend: Optional[str] = None):
+                 backend: Optional[str] = None, grayscale: bool = False):
         """
         Initialize the PDF to Image converter.
 
@@ -101,6 +141,8 @@ class PDFToImageConverter:
             jpeg_quality: JPEG compression quality (1-100)
             backend: PDF rendering backend ('pypdfium2', 'pymupdf', or 'pdf2image')
                     If None, automatically selects best available backend
+            grayscale: Render pages as grayscale (roughly 1/3 the JPEG bytes;
+                      recommended for OCR of black-on-white scans)
         """
         if not PDF_TO_IMAGE_AVAILABLE:
             raise ImportError(
@@ -119,6 +161,7 @@ class PDFToImageConverter:
 
         self.dpi = dpi
         self.jpeg_quality = jpeg_quality
+        self.grayscale = grayscale
         self.backend = self._select_backend(backend)
 
         print(f"Using PDF rendering backend: {self.backend.value}")
@@ -187,35 +230,24 @@ class PDFToImageConverter:
         print(f"Resolution: {self.dpi} DPI")
 
         try:
-            # Convert PDF pages to images using selected backend
-            if self.backend == PDFBackend.PYPDFIUM2:
-                images = self._convert_with_pypdfium2(input_path)
-            elif self.backend == PDFBackend.PYMUPDF:
-                images = self._convert_with_pymupdf(input_path)
-            else:  # PDF2IMAGE
-                images = self._convert_with_pdf2image(input_path)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                if self.backend == PDFBackend.PDF2IMAGE:
+                    # Poppler encodes JPEG natively - no PIL re-encode needed
+                    page_jpegs = self._convert_with_pdf2image(input_path, tmpdir)
+                else:
+                    if self.backend == PDFBackend.PYPDFIUM2:
+                        images = self._convert_with_pypdfium2(input_path)
+                    else:  # PYMUPDF
+                        images = self._convert_with_pymupdf(input_path)
 
-            print(f"Converted {len(images)} page(s) to images")
+                    page_jpegs = self._encode_pages_to_jpegs(images, tmpdir)
 
-            # Convert images to bytes
-            image_bytes_list = []
-            for i, img in enumerate(images, 1):
-                print(f"Processing page {i}/{len(images)}...", end='\r')
+                print(f"Converted {len(page_jpegs)} page(s) to images")
+                print(f"\nCreating image-based PDF...")
 
-                # Ensure compatible color mode
-                if img.mode not in ('RGB', 'RGBA', 'L', 'P', 'CMYK'):
-                    img = img.convert('RGB')
-
-                # Save to in-memory buffer
-                img_buffer = io.BytesIO()
-                img.save(img_buffer, format='JPEG', quality=self.jpeg_quality)
-                image_bytes_list.append(img_buffer.getvalue())
-
-            print(f"\nCreating image-based PDF...")
-
-            # Write final PDF
-            with open(output_path, "wb") as f:
-                f.write(img2pdf.convert(image_bytes_list))
+                # Stream final PDF to disk instead of materializing it in RAM
+                with open(output_path, "wb") as f:
+                    img2pdf.convert(page_jpegs, outputstream=f)
 
             # Show file size comparison
             input_size = input_path.stat().st_size / (1024 * 1024)
@@ -235,46 +267,305 @@ class PDFToImageConverter:
                 print(f"Cleaned up partial output: {output_path}")
             raise Exception(f"Conversion failed: {str(e)}")
 
-    def _convert_with_pypdfium2(self, input_path: Path) -> List:
-        """Convert PDF to images using pypdfium2 backend"""
-        images = []
+    def convert_pages(self, input_pdf: Path, page_ranges: List,
+                      output_paths: List[Path]) -> List[Path]:
+        """
+        Render selected page ranges straight into separate image PDFs.
+
+        Used by the OCR pipeline to produce chunk PDFs directly, avoiding
+        the write+read-back of a full intermediate image PDF that would
+        otherwise exist only to be split again.
+
+        Args:
+            input_pdf: Path to input PDF file
+            page_ranges: List of (first_page, last_page) tuples, 1-based inclusive
+            output_paths: Output PDF path for each range (same length)
+
+        Returns:
+            List of created chunk PDF paths
+        """
+        input_path = Path(input_pdf)
+
+        if not input_path.exists():
+            raise FileNotFoundError(f"Input file not found: {input_pdf}")
+
+        chunk_paths = []
+        for (first_page, last_page), output_pdf in zip(page_ranges, output_paths):
+            output_path = Path(output_pdf)
+            with tempfile.TemporaryDirectory() as tmpdir:
+                if self.backend == PDFBackend.PDF2IMAGE:
+                    page_jpegs = self._convert_with_pdf2image(
+                        input_path, tmpdir, first_page=first_page, last_page=last_page)
+                else:
+                    if self.backend == PDFBackend.PYPDFIUM2:
+                        images = self._convert_with_pypdfium2(
+                            input_path, first_page=first_page, last_page=last_page)
+                    else:  # PYMUPDF
+                        images = self._convert_with_pymupdf(
+                            input_path, first_page=first_page, last_page=last_page)
+                    page_jpegs = self._encode_pages_to_jpegs(images, tmpdir)
+
+                with open(output_path, "wb") as f:
+                    img2pdf.convert(page_jpegs, outputstream=f)
+
+            chunk_paths.append(output_path)
+            print(f"Created chunk {len(chunk_paths)}/{len(page_ranges)}: "
+                  f"{output_path.name} (pages {first_page}-{last_page})")
+
+        return chunk_paths
+
+    def _encode_pages_to_jpegs(self, pages, tmpdir: str) -> List[str]:
+        """
+        Encode rendered pages to JPEG files via a producer/consumer pipeline.
+
+        A producer thread walks the page iterator while the calling thread
+        encodes, so rasterization and JPEG encoding overlap instead of
+        running strictly one after the other. The bounded queue keeps at
+        most a few decoded pages in memory at once.
+        """
+        sentinel = object()
+        page_queue = queue.Queue(maxsize=ENCODE_QUEUE_DEPTH)
+        producer_error = []
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for page in pages:
+                    if cancelled.is_set():
+                        break
+                    page_queue.put(page)
+            except BaseException as e:  # Re-raised on the consumer side
+                producer_error.append(e)
+            finally:
+                page_queue.put(sentinel)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+
+        # tqdm rate-limits its own refreshes; the raw print fallback emits
+        # one flushed write per page, which adds up on multi-thousand-page docs
+        progress = None
+        if TQDM_AVAILABLE:
+            progress = tqdm(desc="Encoding pages", unit="page",
+                            disable=not sys.stderr.isatty())
+
+        page_jpegs = []
+        page_num = 0
+        try:
+            while True:
+                img = page_queue.get()
+                if img is sentinel:
+                    break
+                page_num += 1
+                if progress is not None:
+                    progress.update(1)
+                else:
+                    print(f"Processing page {page_num}...", end='\r')
+
+                if self.grayscale and img.mode != 'L':
+                    img = img.convert('L')
+                # Ensure compatible color mode
+                elif img.mode not in ('RGB', 'RGBA', 'L', 'P', 'CMYK'):
+                    img = img.convert('RGB')
+
+                page_path = os.path.join(tmpdir, f"page_{page_num:06d}.jpg")
+                # Baseline JPEG without the extra optimize pass: progressive
+                # scans and Huffman optimization cost encode time for no OCR
+                # quality gain
+                img.save(page_path, format='JPEG', quality=self.jpeg_quality,
+                         optimize=False, progressive=False)
+                page_jpegs.append(page_path)
+        except BaseException:
+            # The producer may be parked on the full queue; tell it to stop
+            # and drain until its sentinel arrives so it exits and drops its
+            # decoded pages instead of blocking (and pinning them) forever.
+            cancelled.set()
+            while page_queue.get() is not sentinel:
+                pass
+            raise
+        finally:
+            if progress is not None:
+                progress.close()
+
+        producer.join()
+        if producer_error:
+            raise producer_error[0]
+
+        return page_jpegs
+
+    def _convert_with_pypdfium2(self, input_path: Path,
+                                first_page: Optional[int] = None,
+                                last_page: Optional[int] = None) -> Iterator:
+        """
+        Render PDF pages lazily using pypdfium2 backend.
+
+        Yields one PIL image at a time so only the pages currently in the
+        encode pipeline are held in memory, not the whole document.
+        """
         pdf = pdfium.PdfDocument(str(input_path))
 
         # Calculate scale from DPI (1 pdf unit = 1/72 inch)
         scale = self.dpi / 72
 
-        for page_num in range(len(pdf)):
+        start = (first_page - 1) if first_page else 0
+        stop = min(last_page, len(pdf)) if last_page else len(pdf)
+
+        for page_num in range(start, stop):
             page = pdf[page_num]
             # Render at specified DPI
-            pil_image = page.render(scale=scale).to_pil()
-            images.append(pil_image)
+            yield page.render(scale=scale).to_pil()
 
-        return images
+    def _convert_with_pymupdf(self, input_path: Path,
+                              first_page: Optional[int] = None,
+                              last_page: Optional[int] = None) -> Iterator:
+        """
+        Render PDF pages lazily using PyMuPDF backend.
 
-    def _convert_with_pymupdf(self, input_path: Path) -> List:
-        """Convert PDF to images using PyMuPDF backend"""
-        images = []
+        Yields one PIL image at a time; see _convert_with_pypdfium2.
+        """
         doc = fitz.open(str(input_path))
+        try:
+            # Calculate zoom factor from DPI
+            zoom = self.dpi / 72
+            mat = fitz.Matrix(zoom, zoom)
+
+            start = (first_page - 1) if first_page else 0
+            stop = min(last_page, len(doc)) if last_page else len(doc)
+
+            for page_num in range(start, stop):
+                page = doc[page_num]
+                pix = page.get_pixmap(matrix=mat)
+
+                # Convert PyMuPDF pixmap to PIL Image
+                img_data = pix.pil_tobytes(format="JPEG", quality=self.jpeg_quality)
+                yield Image.open(io.BytesIO(img_data))
+        finally:
+            doc.close()
+
+    def _convert_with_pdf2image(self, input_path: Path, output_folder: str,
+                                first_page: Optional[int] = None,
+                                last_page: Optional[int] = None) -> List[str]:
+        """
+        Convert PDF to JPEG files using pdf2image backend (requires Poppler).
 
-        # Calculate zoom factor from DPI
-        zoom = self.dpi / 72
-        mat = fitz.Matrix(zoom, zoom)
-
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            pix = page.get_pixmap(matrix=mat)
-
-            # Convert PyMuPDF pixmap to PIL Image
-            img_data = pix.pil_tobytes(format="JPEG", quality=self.jpeg_quality)
-            pil_image = Image.open(io.BytesIO(img_data))
-            images.append(pil_image)
-
-        doc.close()
-        return images
-
-    def _convert_with_pdf2image(self, input_path: Path) -> List:
-        """Convert PDF to images using pdf2image backend (requires Poppler)"""
-        return convert_from_path(str(input_path), dpi=self.dpi)
+        Poppler writes JPEGs directly to output_folder, so no PIL decode or
+        re-encode pass is needed. Returns the list of JPEG file paths.
+        """
+        # Let poppler render pages in parallel - rasterization is CPU-bound
+        # and each worker is a separate pdftoppm process
+        thread_count = max(1, (os.cpu_count() or 1) - 1)
+        jpegopt = {'quality': self.jpeg_quality, 'optimize': False, 'progressive': False}
+        try:
+            return convert_from_path(str(input_path), dpi=self.dpi,
+                                     thread_count=thread_count,
+                                     output_folder=output_folder,
+                                     first_page=first_page, last_page=last_page,
+                                     grayscale=self.grayscale,
+                                     fmt='jpeg', jpegopt=jpegopt,
+                                     paths_only=True)
+        except OSError as e:
+            # macOS can hit "Too many open files" with many workers;
+            # retry single-threaded rather than failing the conversion
+            if thread_count > 1 and "Too many open files" in str(e):
+                return convert_from_path(str(input_path), dpi=self.dpi,
+                                         thread_count=1,
+                                         output_folder=output_folder,
+                                         first_page=first_page, last_page=last_page,
+                                         grayscale=self.grayscale,
+                                         fmt='jpeg', jpegopt=jpegopt,
+                                         paths_only=True)
+            raise
+
+
+def _copy_for_reference(src: Path, dst: Path):
+    """
+    Link src to dst, falling back to a byte copy when linking fails.
+
+    Batch processing keeps a copy of each original "for reference"; a
+    hardlink provides that at metadata cost instead of re-writing the whole
+    file. The fallback covers cross-device moves, filesystems without link
+    support, and a dst left over from a previous run.
+    """
+    try:
+        os.link(str(src), str(dst))
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def iter_chunk_ranges(total_pages: int,
+                      pages_per_chunk: int) -> Iterator[Tuple[int, int]]:
+    """
+    Yield 0-based half-open (start, end) page ranges covering total_pages.
+
+    Single source of truth for chunk boundaries, shared by the PDF
+    splitters and the direct render-to-chunks path.
+    """
+    for start_page in range(0, total_pages, pages_per_chunk):
+        yield start_page, min(start_page + pages_per_chunk, total_pages)
+
+
+def _append_file_contents(src_path: Path, outfile) -> None:
+    """
+    Append src_path's bytes to the open binary file outfile.
+
+    Uses os.sendfile where the platform and destination support it - the
+    kernel copies between the two descriptors without a userspace bounce
+    buffer - and falls back to shutil.copyfileobj otherwise.
+    """
+    with open(src_path, 'rb') as infile:
+        offset = 0
+        if hasattr(os, 'sendfile'):
+            try:
+                out_fd = outfile.fileno()
+            except (OSError, io.UnsupportedOperation, AttributeError):
+                out_fd = None
+            if out_fd is not None:
+                # Flush Python-level buffering so separators written via
+                # outfile.write() land before the sendfile'd bytes
+                outfile.flush()
+                try:
+                    size = os.fstat(infile.fileno()).st_size
+                    while offset < size:
+                        sent = os.sendfile(out_fd, infile.fileno(),
+                                           offset, size - offset)
+                        if sent == 0:
+                            break
+                        offset += sent
+                    else:
+                        return
+                except OSError:
+                    # e.g. destination on a filesystem sendfile can't
+                    # target; resume from wherever the fast path stopped
+                    pass
+        infile.seek(offset)
+        shutil.copyfileobj(infile, outfile, length=1024 * 1024)
+
+
+def _render_pdf_to_image_chunks(pdf_path, processing_folder, pages_per_chunk,
+                                dpi, jpeg_quality, backend, grayscale=True):
+    """
+    Render one PDF's page ranges into image PDF chunks.
+
+    Module-level so it can run in a ProcessPoolExecutor worker during batch
+    processing (rasterization is CPU-bound and benefits from separate
+    processes). Returns the list of created chunk paths.
+    """
+    pdf_path = Path(pdf_path)
+    processing_folder = Path(processing_folder)
+
+    reader = PdfReader(str(pdf_path))
+    total_pages = len(reader.pages)
+
+    page_ranges = []
+    output_paths = []
+    for chunk_num, (start_page, end_page) in enumerate(
+            iter_chunk_ranges(total_pages, pages_per_chunk)):
+        page_ranges.append((start_page + 1, end_page))
+        output_paths.append(processing_folder / f"{pdf_path.stem}_chunk_{chunk_num + 1}.pdf")
+
+    converter = PDFToImageConverter(dpi=dpi, jpeg_quality=jpeg_quality,
+                                    backend=backend, grayscale=grayscale)
+    return converter.convert_pages(pdf_path, page_ranges, output_paths)
 
 
 class GoogleDriveOCR:
@@ -301,6 +592,12 @@ class GoogleDriveOCR:
         self.token_path = token_path
         self.pages_per_chunk = pages_per_chunk
         self.service = None
+        self._creds = None
+        self._thread_local = threading.local()
+        # Token bucket gating Drive API calls; refilled by a daemon thread
+        self._rate = threading.BoundedSemaphore(DRIVE_RATE_LIMIT_RPS)
+        self._rate_refill_started = False
+        self._rate_lock = threading.Lock()
 
     def authenticate(self):
         """Authenticate with Google Drive API"""
@@ -335,54 +632,145 @@ class GoogleDriveOCR:
                 creds.refresh(httplib2.Http())
                 store.put(creds)
 
-        http = creds.authorize(httplib2.Http())
-        self.service = discovery.build("drive", "v3", http=http)
+        http = creds.authorize(self._build_http())
+        self._creds = creds
+        self.service = self._build_service(http)
         print("Authenticated with Google Drive API")
 
-    def split_pdf(self, input_pdf: Path) -> List[Path]:
-        """
-        Split PDF into smaller chunks.
-
-        Args:
-            input_pdf: Path to PDF file
+    _discovery_lock = threading.Lock()
 
-        Returns:
-            List of chunk file paths
+    def _build_service(self, http):
         """
-        print(f"Splitting {input_pdf.name} into {self.pages_per_chunk}-page chunks...")
+        Build the Drive service, preferring a disk-cached discovery document.
 
-        reader = PdfReader(str(input_pdf))
-        total_pages = len(reader.pages)
-        print(f"Total pages: {total_pages}")
-
-        chunk_files = []
-        num_chunks = (total_pages + self.pages_per_chunk - 1) // self.pages_per_chunk
-
-        for chunk_num in range(num_chunks):
-            start_page = chunk_num * self.pages_per_chunk
-            end_page = min(start_page + self.pages_per_chunk, total_pages)
+        discovery.build fetches and parses a ~400 KB JSON document on every
+        invocation; caching it under ~/.cache/pdf-toolkit saves that network
+        round-trip on each CLI run. Falls back to a live discovery.build
+        when the cache is missing, stale, or unreadable.
+        """
+        cache_path = os.path.join(os.path.expanduser('~'), '.cache',
+                                  'pdf-toolkit', 'drive-v3-discovery.json')
+        try:
+            if time.time() - os.path.getmtime(cache_path) < DISCOVERY_CACHE_MAX_AGE:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    return discovery.build_from_document(f.read(), http=http)
+        except (OSError, ValueError):
+            pass
+
+        # Cache miss: fetch the document once (guarded so concurrent first
+        # calls don't all hit the network) and persist it for next time
+        with self._discovery_lock:
+            try:
+                resp, content = http.request(DISCOVERY_DOC_URL)
+                if int(resp.status) == 200:
+                    doc = content.decode('utf-8')
+                    json.loads(doc)  # Validate before caching
+                    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                    with open(cache_path, 'w', encoding='utf-8') as f:
+                        f.write(doc)
+                    return discovery.build_from_document(doc, http=http)
+            except Exception:
+                pass  # Any failure here just means no cache benefit this run
+
+        return discovery.build("drive", "v3", http=http)
+
+    @staticmethod
+    def _build_http():
+        """
+        Build an httplib2.Http with a disk cache and request timeout.
 
-            writer = PdfWriter()
-            for page_num in range(start_page, end_page):
-                writer.add_page(reader.pages[page_num])
+        The cache keeps conditional-GET copies of static responses (notably
+        the API discovery document) across invocations, and the shared
+        connection pool gives TCP keep-alive across Drive calls.
+        """
+        cache_dir = os.path.join(os.path.expanduser('~'), '.cache',
+                                 'pdf-toolkit', 'httpcache')
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            return httplib2.Http(cache=cache_dir, timeout=30)
+        except OSError:
+            return httplib2.Http(timeout=30)
 
-            chunk_path = input_pdf.parent / f"{input_pdf.stem}_chunk_{chunk_num + 1}.pdf"
-            with open(chunk_path, 'wb') as output_file:
-                writer.write(output_file)
+    def _get_service(self):
+        """
+        Return a Drive service safe to use from the current thread.
 
-            chunk_files.append(chunk_path)
-            print(f"Created chunk {chunk_num + 1}/{num_chunks}: {chunk_path.name} "
-                  f"(pages {start_page + 1}-{end_page})")
+        The googleapiclient service object shares a single Http instance,
+        which is not thread-safe, so worker threads get their own service
+        built from the stored credentials (cached in threading.local).
+        """
+        if self._creds is None:
+            # Not authenticated via authenticate() (e.g. service injected
+            # directly) - fall back to the shared service
+            return self.service
+
+        service = getattr(self._thread_local, 'service', None)
+        if service is None:
+            http = self._creds.authorize(self._build_http())
+            service = self._build_service(http)
+            self._thread_local.service = service
+        return service
+
+    def _acquire_rate_token(self):
+        """Block until a token is available in the Drive rate-limit bucket"""
+        with self._rate_lock:
+            if not self._rate_refill_started:
+                refill = threading.Thread(target=self._refill_rate_tokens, daemon=True)
+                refill.start()
+                self._rate_refill_started = True
+        self._rate.acquire()
+
+    def _refill_rate_tokens(self):
+        """Refill the token bucket at DRIVE_RATE_LIMIT_RPS tokens per second"""
+        while True:
+            time.sleep(1.0 / DRIVE_RATE_LIMIT_RPS)
+            try:
+                self._rate.release()
+            except ValueError:
+                pass  # Bucket already full
 
-        return chunk_files
+    def _execute_with_backoff(self, request_fn):
+        """
+        Execute a Drive API call with rate limiting and exponential backoff.
 
-    def ocr_file(self, input_file: Path, output_file: Path, file_type: str):
+        Retries transient failures (403 rate limits, 429, 5xx) up to
+        DRIVE_MAX_RETRIES times, honoring Retry-After when the server
+        sends one. Non-retryable errors propagate immediately.
+        """
+        for attempt in range(DRIVE_MAX_RETRIES + 1):
+            self._acquire_rate_token()
+            try:
+                return request_fn()
+            except HttpError as e:
+                status = int(e.resp.status) if e.resp is not None else None
+                if status not in RETRYABLE_HTTP_STATUS or attempt == DRIVE_MAX_RETRIES:
+                    raise
+                retry_after = e.resp.get('retry-after') if e.resp is not None else None
+                delay = None
+                if retry_after:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        # RFC 7231 also allows an HTTP-date here; not worth
+                        # parsing - just fall back to exponential backoff
+                        delay = None
+                if delay is None:
+                    delay = min(60, 2 ** attempt + random.random())
+                print(f"Drive API error {status}, retrying in {delay:.1f}s "
+                      f"(attempt {attempt + 1}/{DRIVE_MAX_RETRIES})...")
+                time.sleep(delay)
+
+    def ocr_file(self, input_file: Path, output_file: Union[Path, io.IOBase],
+                 file_type: str):
         """
         Perform OCR on a single file using Google Drive.
 
         Args:
             input_file: Path to input file
-            output_file: Path to save OCR text
+            output_file: Path to save OCR text, or an open binary file-like
+                        object to stream it into (e.g. a BytesIO; avoids a
+                        disk round-trip when the caller consumes the text
+                        immediately)
             file_type: File type (pdf, jpg, png, etc.)
         """
         if self.service is None:
@@ -392,39 +780,79 @@ class GoogleDriveOCR:
         if mime_type is None:
             raise ValueError(f"Unsupported file type: {file_type}")
 
+        service = self._get_service()
+
         file_metadata = {
             'name': input_file.name,
             'mimeType': 'application/vnd.google-apps.document'
         }
 
-        # Upload to Google Drive
-        media = MediaFileUpload(str(input_file), mimetype=mime_type, resumable=True)
-        file = self.service.files().create(
-            body=file_metadata,
-            media_body=media,
-            fields='id'
-        ).execute()
+        # Upload to Google Drive. Small files go up in a single multipart
+        # request; only large ones pay for the resumable upload protocol.
+        resumable = input_file.stat().st_size >= RESUMABLE_UPLOAD_THRESHOLD
+        media = MediaFileUpload(str(input_file), mimetype=mime_type, resumable=resumable)
+        file = self._execute_with_backoff(
+            lambda: service.files().create(
+                body=file_metadata,
+                media_body=media,
+                fields='id'
+            ).execute()
+        )
 
         file_id = file.get('id')
         print(f'Uploaded to Drive (ID: {file_id})')
 
         # Export as text
-        request = self.service.files().export_media(fileId=file_id, mimeType="text/plain")
-        with io.FileIO(str(output_file), "wb") as fh:
+        request = service.files().export_media(fileId=file_id, mimeType="text/plain")
+        if isinstance(output_file, (str, Path)):
+            fh = io.FileIO(str(output_file), "wb")
+            close_fh = True
+        else:
+            fh = output_file
+            close_fh = False
+        try:
             downloader = MediaIoBaseDownload(fh, request)
             done = False
             while not done:
-                status, done = downloader.next_chunk()
+                status, done = self._execute_with_backoff(downloader.next_chunk)
+        finally:
+            if close_fh:
+                fh.close()
 
         # Clean up from Drive
-        self.service.files().delete(fileId=file_id).execute()
-        print(f"OCR complete: {output_file.name}")
+        self._execute_with_backoff(
+            lambda: service.files().delete(fileId=file_id).execute()
+        )
+        done_name = Path(output_file).name if isinstance(output_file, (str, Path)) \
+            else input_file.name
+        print(f"OCR complete: {done_name}")
+
+    def _ocr_one(self, chunk_file: Path,
+                 keep_text: bool = False) -> Union[Path, io.BytesIO]:
+        """
+        OCR a single PDF chunk; used by the worker pool in ocr_pdf_chunked.
+
+        Returns a .txt Path next to the chunk when keep_text is True,
+        otherwise a rewound BytesIO holding the chunk's text - the combine
+        step consumes it immediately, so there is no need to write each
+        chunk's text to disk just to read it straight back.
+        """
+        print(f"\nProcessing {chunk_file.name}...")
+        if keep_text:
+            chunk_output = chunk_file.with_suffix('.txt')
+            self.ocr_file(chunk_file, chunk_output, 'pdf')
+            return chunk_output
+        buffer = io.BytesIO()
+        self.ocr_file(chunk_file, buffer, 'pdf')
+        buffer.seek(0)
+        return buffer
 
     def ocr_pdf_chunked(self, pdf_path: Path, output_path: Optional[Path] = None,
                        keep_chunks: bool = False, delete_original: bool = False,
                        auto_convert: bool = AUTO_CONVERT_TO_IMAGE,
                        dpi: int = DEFAULT_DPI, jpeg_quality: int = DEFAULT_JPEG_QUALITY,
-                       backend: Optional[str] = None) -> Path:
+                       backend: Optional[str] = None, grayscale: bool = True,
+                       chunk_files: Optional[List[Path]] = None) -> Path:
         """
         Process a PDF by optionally converting to image PDF, splitting into chunks, and performing OCR.
 
@@ -436,6 +864,10 @@ class GoogleDriveOCR:
             auto_convert: Automatically convert to high-quality image PDF before OCR
             dpi: DPI for image conversion (if auto_convert is True)
             jpeg_quality: JPEG quality for image conversion (if auto_convert is True)
+            grayscale: Render grayscale image chunks - black-on-white scans
+                      OCR identically at about a third of the upload bytes
+            chunk_files: Pre-rendered chunk PDFs (skips conversion and splitting);
+                        used by the batch pipeline
 
         Returns:
             Path to final text output
@@ -452,44 +884,46 @@ class GoogleDriveOCR:
         if output_path is None:
             output_path = processing_folder / f"{pdf_path.stem}_ocr_text.txt"
 
-        # Automatically convert to high-quality image PDF before OCR
-        pdf_to_process = pdf_path
-        if auto_convert and PDF_TO_IMAGE_AVAILABLE:
-            print(f"\nConverting PDF to high-quality image PDF for better OCR...")
-            converter = PDFToImageConverter(dpi=dpi, jpeg_quality=jpeg_quality, backend=backend)
-            image_pdf_path = processing_folder / f"{pdf_path.stem}_image.pdf"
+        # Automatically convert to high-quality image PDF chunks before OCR.
+        # Rendering page ranges straight into chunk PDFs avoids writing (and
+        # re-reading) a full intermediate image PDF just to split it.
+        if chunk_files is None and auto_convert and PDF_TO_IMAGE_AVAILABLE:
+            print(f"\nConverting PDF to high-quality image PDF chunks for better OCR...")
             try:
-                pdf_to_process = converter.convert(pdf_path, image_pdf_path)
-                print(f"Image PDF created: {image_pdf_path.name}")
+                chunk_files = _render_pdf_to_image_chunks(
+                    pdf_path, processing_folder, self.pages_per_chunk,
+                    dpi, jpeg_quality, backend, grayscale=grayscale)
             except Exception as e:
-                print(f"Warning: Could not convert to image PDF: {e}")
+                print(f"Warning: Could not convert to image PDF chunks: {e}")
                 print("Proceeding with original PDF...")
-                pdf_to_process = pdf_path
-
-        # Split PDF into chunks (chunks go into processing folder)
-        chunk_files = self.split_pdf_to_folder(pdf_to_process, processing_folder)
-
-        # Process each chunk
-        text_files = []
-        for chunk_file in chunk_files:
-            chunk_output = chunk_file.with_suffix('.txt')
-            print(f"\nProcessing {chunk_file.name}...")
-            self.ocr_file(chunk_file, chunk_output, 'pdf')
-            text_files.append(chunk_output)
-
-        # Combine all text files
+                chunk_files = None
+
+        # Fall back to splitting the PDF as-is (chunks go into processing folder)
+        if chunk_files is None:
+            chunk_files = self.split_pdf_to_folder(pdf_path, processing_folder)
+
+        # Process chunks concurrently - each one is an independent Drive
+        # round-trip dominated by network latency. executor.map preserves
+        # chunk order for the combine step below.
+        with ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS) as executor:
+            text_chunks = list(executor.map(
+                lambda chunk_file: self._ocr_one(chunk_file, keep_text=keep_chunks),
+                chunk_files))
+
+        # Combine all chunk texts. Per-chunk text only hits disk when
+        # keep_chunks is set; otherwise each worker hands back a BytesIO and
+        # the bytes are appended straight to the final output. Copy bytes
+        # across rather than read()-ing into Python strings (which would
+        # decode and re-encode tens of MB of UTF-8 for large OCR outputs).
         print(f"\nCombining chunks into {output_path.name}...")
-        with open(output_path, 'w', encoding='utf-8') as outfile:
-            for i, text_file in enumerate(text_files, 1):
-                with open(text_file, 'r', encoding='utf-8') as infile:
-                    content = infile.read()
-                    outfile.write(content)
-                    if i < len(text_files):
-                        outfile.write("\n\n" + "="*50 + f" Chunk {i} End " + "="*50 + "\n\n")
-
-                # Clean up text file
-                if not keep_chunks:
-                    os.remove(text_file)
+        with open(output_path, 'wb') as outfile:
+            for i, text_chunk in enumerate(text_chunks, 1):
+                if isinstance(text_chunk, Path):
+                    _append_file_contents(text_chunk, outfile)
+                else:
+                    shutil.copyfileobj(text_chunk, outfile, length=1024 * 1024)
+                if i < len(text_chunks):
+                    outfile.write(_CHUNK_SEPARATOR_TEMPLATE % i)
 
         # Clean up chunk PDFs
         if not keep_chunks:
@@ -506,50 +940,96 @@ class GoogleDriveOCR:
         print(f"All files organized in: {processing_folder}")
         return output_path
 
-    def split_pdf_to_folder(self, input_pdf: Path, output_folder: Path) -> List[Path]:
+    def split_pdf_to_folder(self, input_pdf: Path,
+                            output_folder: Optional[Path] = None) -> List[Path]:
         """
         Split PDF into smaller chunks and save to specified folder.
 
         Args:
             input_pdf: Path to PDF file
-            output_folder: Folder to save chunks
+            output_folder: Folder to save chunks (defaults to the input
+                          PDF's own folder)
 
         Returns:
             List of chunk file paths
         """
+        if output_folder is None:
+            output_folder = input_pdf.parent
         print(f"Splitting {input_pdf.name} into {self.pages_per_chunk}-page chunks...")
 
+        if PIKEPDF_AVAILABLE:
+            return self._split_with_pikepdf(input_pdf, output_folder)
+        return self._split_with_pypdf2(input_pdf, output_folder)
+
+    def _split_with_pikepdf(self, input_pdf: Path, output_folder: Path) -> List[Path]:
+        """
+        Split PDF chunks using pikepdf (libqpdf).
+
+        Page extraction is a C-level reference copy inside libqpdf, avoiding
+        PyPDF2's per-page object-graph clone and re-serialization - much
+        faster and lighter on memory for large image PDFs.
+        """
+        chunk_files = []
+        with pikepdf.open(str(input_pdf)) as src:
+            total_pages = len(src.pages)
+            print(f"Total pages: {total_pages}")
+
+            chunk_ranges = list(iter_chunk_ranges(total_pages, self.pages_per_chunk))
+            num_chunks = len(chunk_ranges)
+
+            for chunk_num, (start_page, end_page) in enumerate(chunk_ranges):
+                chunk_path = output_folder / f"{input_pdf.stem}_chunk_{chunk_num + 1}.pdf"
+                with pikepdf.Pdf.new() as dst:
+                    dst.pages.extend(src.pages[start_page:end_page])
+                    dst.save(str(chunk_path))
+
+                chunk_files.append(chunk_path)
+                print(f"Created chunk {chunk_num + 1}/{num_chunks}: {chunk_path.name} "
+                      f"(pages {start_page + 1}-{end_page})")
+
+        return chunk_files
+
+    def _split_with_pypdf2(self, input_pdf: Path, output_folder: Path) -> List[Path]:
+        """Split PDF chunks using PyPDF2 (fallback when pikepdf is unavailable)"""
         reader = PdfReader(str(input_pdf))
-        total_pages = len(reader.pages)
+        pages = reader.pages  # Resolve the page list once, not per chunk
+        total_pages = len(pages)
         print(f"Total pages: {total_pages}")
 
-        chunk_files = []
-        num_chunks = (total_pages + self.pages_per_chunk - 1) // self.pages_per_chunk
+        chunk_ranges = list(iter_chunk_ranges(total_pages, self.pages_per_chunk))
+        num_chunks = len(chunk_ranges)
+
+        # PdfReader parses lazily from a shared stream, so page cloning is
+        # serialized under a lock; each chunk's write() (the dominant cost -
+        # full re-serialization of its object graph) runs in parallel.
+        reader_lock = threading.Lock()
 
-        for chunk_num in range(num_chunks):
-            start_page = chunk_num * self.pages_per_chunk
-            end_page = min(start_page + self.pages_per_chunk, total_pages)
+        def write_chunk(chunk_num: int) -> Path:
+            start_page, end_page = chunk_ranges[chunk_num]
 
             writer = PdfWriter()
-            for page_num in range(start_page, end_page):
-                writer.add_page(reader.pages[page_num])
+            with reader_lock:
+                for page_num in range(start_page, end_page):
+                    writer.add_page(pages[page_num])
 
             chunk_path = output_folder / f"{input_pdf.stem}_chunk_{chunk_num + 1}.pdf"
             with open(chunk_path, 'wb') as output_file:
                 writer.write(output_file)
 
-            chunk_files.append(chunk_path)
             print(f"Created chunk {chunk_num + 1}/{num_chunks}: {chunk_path.name} "
                   f"(pages {start_page + 1}-{end_page})")
+            return chunk_path
 
-        return chunk_files
+        with ThreadPoolExecutor(max_workers=min(4, max(1, num_chunks))) as executor:
+            return list(executor.map(write_chunk, range(num_chunks)))
 
     def scan_and_process_directory(self, directory: Path = Path('.'),
                                    file_types: Optional[List[str]] = None,
                                    auto_convert: bool = AUTO_CONVERT_TO_IMAGE,
                                    dpi: int = DEFAULT_DPI,
                                    jpeg_quality: int = DEFAULT_JPEG_QUALITY,
-                                   backend: Optional[str] = None):
+                                   backend: Optional[str] = None,
+                                   grayscale: bool = True):
         """
         Scan directory for files and process them with OCR using organized batch folders.
 
@@ -564,7 +1044,7 @@ class GoogleDriveOCR:
             self.authenticate()
 
         if file_types is None:
-            file_types = list(MIME_TYPES.keys())
+            file_types = sorted(_SUPPORTED_EXTS)
 
         # Create batch processing folder
         import time
@@ -576,11 +1056,14 @@ class GoogleDriveOCR:
         # Organize files by type
         files_by_type: Dict[str, List[Path]] = {ft: [] for ft in file_types}
 
-        for file_path in directory.iterdir():
-            if file_path.is_file():
-                ext = file_path.suffix.lstrip('.').lower()
-                if ext in files_by_type:
-                    files_by_type[ext].append(file_path)
+        # os.scandir reuses the dirent's cached file type, avoiding one
+        # stat() per entry compared to Path.iterdir + is_file
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    ext = os.path.splitext(entry.name)[1][1:].lower()
+                    if ext in files_by_type:
+                        files_by_type[ext].append(Path(entry.path))
 
         # Display found files
         print("\nFiles found:")
@@ -593,25 +1076,65 @@ class GoogleDriveOCR:
             print("\n" + "="*60)
             print("Processing PDF files with automatic conversion and chunking")
             print("="*60)
-            for pdf_path in files_by_type["pdf"]:
-                print(f"\nProcessing: {pdf_path.name}")
 
+            # Stage the batch folders and copies up front
+            pdf_jobs = []
+            for pdf_path in files_by_type["pdf"]:
                 # Create individual folder for this PDF within batch folder
                 pdf_folder = batch_folder / pdf_path.stem
                 pdf_folder.mkdir(exist_ok=True)
 
-                # Process with output in the PDF's folder
-                output_path = pdf_folder / f"{pdf_path.stem}_ocr_text.txt"
-
                 # Copy original to PDF folder for reference
-                import shutil
                 original_copy = pdf_folder / pdf_path.name
-                shutil.copy2(pdf_path, original_copy)
+                _copy_for_reference(pdf_path, original_copy)
 
-                # Process the PDF (creates its own processing subfolder)
-                self.ocr_pdf_chunked(original_copy, output_path, keep_chunks=False,
-                                    auto_convert=auto_convert, dpi=dpi, jpeg_quality=jpeg_quality,
-                                    backend=backend)
+                output_path = pdf_folder / f"{pdf_path.stem}_ocr_text.txt"
+                pdf_jobs.append((original_copy, output_path))
+
+            # Rasterize PDFs across worker processes (CPU-bound, one
+            # poppler/pdfium per process) and hand each file to the OCR
+            # pool (network-bound) as soon as its chunks are ready, so
+            # uploads overlap with rendering of the remaining PDFs
+            output_by_pdf = dict(pdf_jobs)
+            ocr_futures = []
+            with ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS) as ocr_pool:
+                def submit_ocr(original_copy, chunk_files=None):
+                    print(f"\nProcessing: {original_copy.name}")
+                    ocr_futures.append(ocr_pool.submit(
+                        self.ocr_pdf_chunked, original_copy,
+                        output_by_pdf[original_copy],
+                        keep_chunks=False, auto_convert=auto_convert,
+                        dpi=dpi, jpeg_quality=jpeg_quality, backend=backend,
+                        grayscale=grayscale, chunk_files=chunk_files))
+
+                if auto_convert and PDF_TO_IMAGE_AVAILABLE and len(pdf_jobs) > 1:
+                    raster_workers = min(os.cpu_count() or 1, RASTER_MAX_WORKERS)
+                    with ProcessPoolExecutor(max_workers=raster_workers) as raster_pool:
+                        futures = {}
+                        for original_copy, _ in pdf_jobs:
+                            processing_folder = original_copy.parent / f"{original_copy.stem}_processing"
+                            processing_folder.mkdir(exist_ok=True)
+                            futures[raster_pool.submit(
+                                _render_pdf_to_image_chunks,
+                                original_copy, processing_folder, self.pages_per_chunk,
+                                dpi, jpeg_quality, backend, grayscale)] = original_copy
+                        for future in as_completed(futures):
+                            original_copy = futures[future]
+                            chunk_files = None
+                            try:
+                                chunk_files = future.result()
+                            except Exception as e:
+                                # ocr_pdf_chunked will retry conversion (or fall
+                                # back to splitting the original) for this file
+                                print(f"Warning: Rasterization failed for "
+                                      f"{original_copy.name}: {e}")
+                            submit_ocr(original_copy, chunk_files)
+                else:
+                    for original_copy, _ in pdf_jobs:
+                        submit_ocr(original_copy)
+
+                for future in ocr_futures:
+                    future.result()
 
         # Process other file types
         for file_type in [ft for ft in file_types if ft != "pdf"]:
@@ -628,9 +1151,8 @@ class GoogleDriveOCR:
                     file_folder.mkdir(exist_ok=True)
 
                     # Copy original
-                    import shutil
                     original_copy = file_folder / input_path.name
-                    shutil.copy2(input_path, original_copy)
+                    _copy_for_reference(input_path, original_copy)
 
                     output_path = file_folder / f"{input_path.stem}_ocr_text.txt"
                     print(f"Converting: {input_path.name}")
@@ -642,8 +1164,15 @@ class GoogleDriveOCR:
         print("="*60)
 
 
+@functools.lru_cache(maxsize=1)
 def create_parser() -> argparse.ArgumentParser:
-    """Create and configure argument parser"""
+    """
+    Create and configure argument parser.
+
+    Cached: the subparser tree is immutable once built and parse_args
+    doesn't mutate it, so repeated callers (notably tests that invoke
+    main() many times) share one instance.
+    """
     parser = argparse.ArgumentParser(
         description='PDF Toolkit - Convert PDFs to images or perform OCR processing',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -677,6 +1206,8 @@ Examples:
                                help=f'JPEG quality 1-100 (default: {DEFAULT_JPEG_QUALITY})')
     convert_parser.add_argument('--backend', type=str, choices=['pypdfium2', 'pymupdf', 'pdf2image'],
                                help='PDF rendering backend (default: auto-select best available)')
+    convert_parser.add_argument('--grayscale', action='store_true',
+                               help='Render pages as grayscale (smaller output, good for scans)')
 
     # OCR command
     ocr_parser = subparsers.add_parser('ocr',
@@ -702,6 +1233,8 @@ Examples:
                            help=f'JPEG quality for image conversion (default: {DEFAULT_JPEG_QUALITY}, only if converting)')
     ocr_parser.add_argument('--backend', type=str, choices=['pypdfium2', 'pymupdf', 'pdf2image'],
                            help='PDF rendering backend (default: auto-select best available)')
+    ocr_parser.add_argument('--no-grayscale', action='store_true',
+                           help='Keep color when converting for OCR (default: grayscale, ~3x smaller uploads)')
 
     # OCR batch command
     batch_parser = subparsers.add_parser('ocr-batch',
@@ -724,6 +1257,8 @@ Examples:
                              help=f'JPEG quality for image conversion (default: {DEFAULT_JPEG_QUALITY}, only if converting)')
     batch_parser.add_argument('--backend', type=str, choices=['pypdfium2', 'pymupdf', 'pdf2image'],
                              help='PDF rendering backend (default: auto-select best available)')
+    batch_parser.add_argument('--no-grayscale', action='store_true',
+                             help='Keep color when converting for OCR (default: grayscale, ~3x smaller uploads)')
 
     return parser
 
@@ -741,7 +1276,8 @@ def main():
         if args.command == 'convert':
             # PDF to Image conversion
             backend = getattr(args, 'backend', None)
-            converter = PDFToImageConverter(dpi=args.dpi, jpeg_quality=args.quality, backend=backend)
+            converter = PDFToImageConverter(dpi=args.dpi, jpeg_quality=args.quality, backend=backend,
+                                            grayscale=args.grayscale)
             input_path = Path(args.input)
             output_path = Path(args.output) if args.output else None
             converter.convert(input_path, output_path)
@@ -772,7 +1308,8 @@ def main():
                     auto_convert=not args.no_convert,
                     dpi=args.dpi,
                     jpeg_quality=args.quality,
-                    backend=backend
+                    backend=backend,
+                    grayscale=not args.no_grayscale
                 )
             else:
                 if output_path is None:
@@ -797,7 +1334,8 @@ def main():
                 auto_convert=not args.no_convert,
                 dpi=args.dpi,
                 jpeg_quality=args.quality,
-                backend=backend
+                backend=backend,
+                grayscale=not args.no_grayscale
             )
 
         print("\nOperation completed successfully!")